@@ -6,22 +6,76 @@ Main FastAPI application with WebSocket endpoint for streaming TTS
 import asyncio
 import json
 import logging
+import os
+import re
 import uuid
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Optional
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 import uvicorn
+import msgpack
 
-from tts_engine import TTSEngine, ConnectionManager
+from tts_engine import TTSEngine, TTSProcessPool, ConnectionManager
 
+# Fast JSON for parsing inbound messages (falls back to stdlib json)
+try:
+    import orjson
+    
+    def json_loads(data):
+        return orjson.loads(data)
+except ImportError:
+    def json_loads(data):
+        return json.loads(data)
+
+
+def pack_message(obj) -> bytes:
+    """Encode an outbound message as a MessagePack binary frame (bytes stay raw)"""
+    return msgpack.packb(obj, use_bin_type=True)
+
+
+# Constant error frames, encoded once at import time
+_ERR_INVALID_JSON = pack_message({"error": "Invalid JSON format"})
+_ERR_PROCESSING = pack_message({"error": "Processing error"})
+_ERR_TTS_FAILED = pack_message({"error": "TTS processing failed"})
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+
+# Configure logging (level from LOG_LEVEL, default INFO)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
+# Common abbreviations that should NOT trigger sentence processing
+# (lowercased, without the trailing period)
+_ABBREVIATIONS = frozenset({
+    # Titles
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'rev', 'st', 'mt',
+    
+    # Name suffixes
+    'jr', 'sr', 'ii', 'iii',
+    
+    # Academic/Professional
+    'phd', 'md', 'lld', 'ba', 'bs', 'ma',
+    
+    # Common abbreviations
+    'etc', 'vs', 'e.g', 'i.e', 'inc', 'corp', 'ltd', 'co', 'llc',
+    
+    # Geographic
+    'u.s', 'u.k', 'n.y', 'l.a', 'd.c',
+    
+    # Time/Date
+    'a.m', 'p.m',
+    
+    # Units/Measurements
+    'in', 'ft', 'lb', 'oz', 'gal', 'min', 'sec', 'max',
+})
+
+# Sentence punctuation with the (possibly dotted) word directly before it, e.g.
+# "U.S" + "." -- the word is looked up in _ABBREVIATIONS instead of regex alternation
+_PUNCT_TOKEN_RE = re.compile(r'((?<!\w)\w+(?:\.\w+)*)?([.!?])')
+
 # Global variables
 tts_engine = None
 connection_manager = None
@@ -35,14 +89,30 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting TTS WebSocket Service...")
     try:
-        tts_engine = TTSEngine()
+        # TTS_WORKERS > 0 runs inference in that many worker processes
+        workers = int(os.getenv("TTS_WORKERS", "0"))
+        compile_model = os.getenv("TTS_COMPILE") == "1"
+        # Concurrent model invocations across all sessions (size to hardware parallelism)
+        concurrency = int(os.getenv("TTS_CONCURRENCY", "4"))
+        if workers > 0:
+            tts_engine = TTSProcessPool(workers, compile_model=compile_model, concurrency=concurrency)
+        else:
+            tts_engine = TTSEngine(compile_model=compile_model, concurrency=concurrency)
         await tts_engine.initialize()
         connection_manager = ConnectionManager()
         logger.info("TTS Engine and Connection Manager initialized successfully")
     except Exception as e:
-        logger.error(f"Failed to initialize TTS engine: {e}")
+        logger.error("Failed to initialize TTS engine: %s", e)
         raise
     
+    # Cache the UI page so requests to / don't hit the filesystem
+    try:
+        with open("static/index.html", "rb") as f:
+            app.state.index_bytes = f.read()
+    except FileNotFoundError:
+        app.state.index_bytes = None
+        logger.warning("static/index.html not found, UI will not be served")
+    
     yield
     
     # Shutdown
@@ -61,22 +131,37 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+class CachedStaticFiles(StaticFiles):
+    """Static files with Cache-Control headers for browser caching"""
+    
+    # Content-hashed asset names (e.g. app.3f2a9c1b.js) never change in place
+    HASHED_ASSET_RE = re.compile(r'\.[0-9a-f]{8,}\.[A-Za-z0-9]+$')
+    
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        """Build the file response and attach caching headers"""
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if self.HASHED_ASSET_RE.search(str(full_path)):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            # Unversioned assets are revalidated via ETag, so repeat hits become 304s
+            response.headers["Cache-Control"] = "public, no-cache"
+        return response
+
+
 # Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
 
 
 @app.get("/")
 async def get_index():
     """Serve the main UI page"""
-    try:
-        with open("static/index.html", "r") as f:
-            content = f.read()
-        return HTMLResponse(content=content)
-    except FileNotFoundError:
+    index_bytes = app.state.index_bytes
+    if index_bytes is None:
         return HTMLResponse(
             content="<h1>TTS WebSocket Service</h1><p>Frontend not found. Please ensure static/index.html exists.</p>",
             status_code=404
         )
+    return HTMLResponse(content=index_bytes)
 
 
 @app.websocket("/ws")
@@ -85,14 +170,17 @@ async def websocket_endpoint(websocket: WebSocket):
     Main WebSocket endpoint for bidirectional TTS streaming
     
     Protocol:
-    - Input: {"text": " "} - Initialize session
-    - Input: {"text": "content"} - Add text chunk
-    - Input: {"text": ""} - Close session
-    - Input: {"flush": true} - Force processing
-    - Output: {"audio": "base64", "alignment": {...}}
+    - Input: {"type": "text", "text": " "} - Initialize session
+    - Input: {"type": "text", "text": "content"} - Add text chunk
+    - Input: {"type": "text", "text": ""} - Close session
+    - Input: {"type": "flush"} - Force processing
+    - Input: {"type": "reset"} - Reset session for new text input
+      (messages without "type", e.g. {"text": ...} or {"flush": true}, are still accepted)
+    - Output: {"audio": <raw PCM bytes>, "alignment": {...}, "text_delta": "...", "seq": n}
+      (MessagePack binary frames)
     """
     session_id = str(uuid.uuid4())
-    logger.info(f"New WebSocket connection: {session_id}")
+    logger.info("New WebSocket connection: %s", session_id)
     
     try:
         # Accept the WebSocket connection
@@ -101,96 +189,130 @@ async def websocket_endpoint(websocket: WebSocket):
         # Register the connection
         await connection_manager.connect(websocket, session_id)
         
-        # Main message processing loop
-        while True:
+        # Main message processing loop; ends once the session is reaped for idling
+        while connection_manager.has_session(session_id):
             try:
                 # Receive message from client
                 data = await websocket.receive_text()
-                message = json.loads(data)
+                message = json_loads(data)
                 
-                logger.debug(f"Session {session_id} received: {message}")
+                logger.debug("Session %s received: %s", session_id, message)
                 
-                # Handle different message types
-                if "text" in message:
-                    text = message["text"]
-                    
-                    if text == " ":
-                        # Initialize session
-                        logger.info(f"Session {session_id} initialized")
-                        await connection_manager.initialize_session(session_id)
-                        
-                    elif text == "":
-                        # Close session - process remaining text and close
-                        logger.info(f"Session {session_id} closing")
-                        await process_remaining_text(session_id, websocket)
-                        break
-                        
-                    else:
-                        # Add text chunk to buffer
-                        await connection_manager.add_text_chunk(session_id, text)
-                        
-                        # Check if we should process (natural break)
-                        if should_process_text(session_id):
-                            await process_text_buffer(session_id, websocket)
+                # Dispatch on message type (one lookup instead of probing each key)
+                handler = _HANDLERS.get(message.get("type") or _legacy_message_type(message))
+                if handler is None:
+                    logger.warning("Session %s unknown message format: %s", session_id, message)
+                    continue
                 
-                elif message.get("flush"):
-                    # Force processing of current buffer
-                    logger.info(f"Session {session_id} flush requested")
-                    await process_text_buffer(session_id, websocket)
-                
-                elif message.get("reset"):
-                    # Reset session for new text input
-                    logger.info(f"Session {session_id} reset requested")
-                    await connection_manager.initialize_session(session_id)
-                
-                else:
-                    logger.warning(f"Session {session_id} unknown message format: {message}")
+                if await handler(session_id, websocket, message):
+                    break
                     
             except json.JSONDecodeError as e:
-                logger.error(f"Session {session_id} JSON decode error: {e}")
-                try:
-                    await websocket.send_text(json.dumps({"error": "Invalid JSON format"}))
-                except Exception as send_error:
-                    logger.error(f"Failed to send JSON error message: {send_error}")
-                    break  # Connection is likely closed, exit loop
+                logger.error("Session %s JSON decode error: %s", session_id, e)
+                # Queued so it is framed and ordered like any other outbound message
+                await connection_manager.enqueue_message(session_id, _ERR_INVALID_JSON)
                 
             except WebSocketDisconnect:
-                logger.info(f"Session {session_id} client disconnected")
+                logger.info("Session %s client disconnected", session_id)
                 break  # Exit the loop when client disconnects
                 
             except Exception as e:
-                logger.error(f"Session {session_id} processing error: {e}")
-                logger.error(f"Error type: {type(e).__name__}")
-                logger.error(f"Error details: {str(e)}")
-                # Don't try to send error message if connection is already closed
-                if not isinstance(e, WebSocketDisconnect):
-                    try:
-                        await websocket.send_text(json.dumps({"error": "Processing error"}))
-                    except Exception as send_error:
-                        logger.error(f"Failed to send error message: {send_error}")
+                logger.error("Session %s processing error: %s", session_id, e)
+                logger.error("Error type: %s", type(e).__name__)
+                logger.error("Error details: %s", e)
+                # Stop once the socket is closed (e.g. by the idle reaper) instead of
+                # retrying receive_text, which would fail immediately every time
+                if (not connection_manager.has_session(session_id)
+                        or websocket.application_state != WebSocketState.CONNECTED):
+                    break
+                await connection_manager.enqueue_message(session_id, _ERR_PROCESSING)
                 
     except WebSocketDisconnect:
-        logger.info(f"Session {session_id} disconnected")
+        logger.info("Session %s disconnected", session_id)
         
     except Exception as e:
-        logger.error(f"Session {session_id} unexpected error: {e}")
+        logger.error("Session %s unexpected error: %s", session_id, e)
         
     finally:
         # Clean up connection
         await connection_manager.disconnect(session_id)
-        logger.info(f"Session {session_id} cleanup completed")
+        logger.info("Session %s cleanup completed", session_id)
+
+
+async def handle_text(session_id: str, websocket: WebSocket, message: Dict[str, Any]) -> bool:
+    """Handle a text message; returns True when the session should close"""
+    text = message.get("text")
+    
+    if not isinstance(text, str):
+        logger.warning("Session %s text message without text: %s", session_id, message)
+        
+    elif text == " ":
+        # Initialize session
+        logger.info("Session %s initialized", session_id)
+        await connection_manager.initialize_session(session_id)
+        
+    elif text == "":
+        # Close session - process remaining text and close
+        logger.info("Session %s closing", session_id)
+        await process_remaining_text(session_id)
+        return True
+        
+    else:
+        # Add text chunk to buffer
+        await connection_manager.add_text_chunk(session_id, text)
+        
+        # Check if we should process (natural break)
+        if should_process_text(session_id):
+            await process_text_buffer(session_id, split_at_sentence=True)
+    
+    return False
+
+
+async def handle_flush(session_id: str, websocket: WebSocket, message: Dict[str, Any]) -> bool:
+    """Force processing of the current buffer"""
+    logger.info("Session %s flush requested", session_id)
+    await process_text_buffer(session_id)
+    return False
+
+
+async def handle_reset(session_id: str, websocket: WebSocket, message: Dict[str, Any]) -> bool:
+    """Reset session for new text input"""
+    logger.info("Session %s reset requested", session_id)
+    await connection_manager.reset_session(session_id)
+    return False
+
+
+_HANDLERS = {
+    "text": handle_text,
+    "flush": handle_flush,
+    "reset": handle_reset,
+}
+
+
+def _legacy_message_type(message: Dict[str, Any]) -> Optional[str]:
+    """Infer the type of a message sent without a "type" field"""
+    if "text" in message:
+        return "text"
+    if message.get("flush"):
+        return "flush"
+    if message.get("reset"):
+        return "reset"
+    return None
 
 
 def should_process_text(session_id: str) -> bool:
     """Check if text buffer should be processed based on natural breaks and buffer size"""
     try:
-        text_buffer = connection_manager.get_text_buffer(session_id)
-        
-        # Check for true sentence endings (not abbreviations)
-        has_sentence_end = has_true_sentence_ending(text_buffer)
+        # Process if buffer is getting long (avoid too much latency)
+        buffer_too_long = connection_manager.get_buffer_len(session_id) > 100
         
-        # Also process if buffer is getting long (avoid too much latency)
-        buffer_too_long = len(text_buffer.strip()) > 100
+        # Check for true sentence endings (not abbreviations), skipping the
+        # scan entirely when no punctuation has arrived since the last flush.
+        # Earlier text was already checked, so only the new tail is scanned.
+        has_sentence_end = (
+            connection_manager.has_punctuation(session_id)
+            and has_true_sentence_ending(connection_manager.get_unscanned_tail(session_id))
+        )
         
         # Process if we have a complete sentence or buffer is getting long
         return has_sentence_end or buffer_too_long
@@ -201,129 +323,109 @@ def should_process_text(session_id: str) -> bool:
 
 def has_true_sentence_ending(text: str) -> bool:
     """Check for true sentence endings, ignoring common abbreviations"""
-    import re
-    
-    # Common abbreviations that should NOT trigger sentence processing
-    abbreviations = [
-        # Titles
-        r'\bMr\.',
-        r'\bMrs\.',
-        r'\bMs\.',
-        r'\bDr\.',
-        r'\bProf\.',
-        r'\bRev\.',
-        r'\bSt\.',
-        r'\bMt\.',
-        
-        # Name suffixes
-        r'\bJr\.',
-        r'\bSr\.',
-        r'\bII\.',
-        r'\bIII\.',
-        
-        # Academic/Professional
-        r'\bPhD\.',
-        r'\bMD\.',
-        r'\bLLD\.',
-        r'\bBA\.',
-        r'\bBS\.',
-        r'\bMA\.',
-        r'\bMS\.',
-        
-        # Common abbreviations
-        r'\betc\.',
-        r'\bvs\.',
-        r'\be\.g\.',
-        r'\bi\.e\.',
-        r'\bInc\.',
-        r'\bCorp\.',
-        r'\bLtd\.',
-        r'\bCo\.',
-        r'\bLLC\.',
-        
-        # Geographic
-        r'\bU\.S\.',
-        r'\bU\.K\.',
-        r'\bN\.Y\.',
-        r'\bL\.A\.',
-        r'\bD\.C\.',
-        
-        # Time/Date
-        r'\ba\.m\.',
-        r'\bp\.m\.',
-        r'\bA\.M\.',
-        r'\bP\.M\.',
-        
-        # Units/Measurements
-        r'\bin\.',
-        r'\bft\.',
-        r'\blb\.',
-        r'\boz\.',
-        r'\bgal\.',
-        r'\bmin\.',
-        r'\bsec\.',
-        r'\bmax\.',
-    ]
+    return next(_iter_sentence_endings(text), None) is not None
+
+
+def find_sentence_split(text: str) -> int:
+    """Return the index just past the last true sentence ending, or 0 if there is none"""
+    split = 0
+    for split in _iter_sentence_endings(text):
+        pass
+    return split
+
+
+def _iter_sentence_endings(text: str):
+    """Yield the end offset of each sentence-ending punctuation mark in text"""
+    for match in _PUNCT_TOKEN_RE.finditer(text):
+        word = match.group(1)
+        if match.group(2) == '.' and word and _is_abbreviation(word.lower()):
+            continue
+        yield match.end()
+
+
+def _is_abbreviation(word: str) -> bool:
+    """Check if a lowercased (possibly dotted) word is an abbreviation or a run of them"""
+    if word in _ABBREVIATIONS:
+        return True
+    if '.' not in word:
+        return False
     
-    # Create pattern for all abbreviations
-    abbrev_pattern = '|'.join(abbreviations)
+    # Run-together abbreviations like "mr.dr": consume parts left to right,
+    # preferring two-part entries such as "u.s"
+    parts = word.split('.')
+    i = 0
+    while i < len(parts):
+        if i + 1 < len(parts) and f"{parts[i]}.{parts[i + 1]}" in _ABBREVIATIONS:
+            i += 2
+        elif parts[i] in _ABBREVIATIONS:
+            i += 1
+        else:
+            return False
+    return True
+
+
+async def process_text_buffer(session_id: str, split_at_sentence: bool = False):
+    """
+    Submit the current text buffer for background TTS generation
     
-    # Remove abbreviations from text temporarily
-    text_without_abbrevs = re.sub(abbrev_pattern, 'ABBREV', text, flags=re.IGNORECASE)
+    With split_at_sentence, only text up to the last true sentence ending is
+    submitted and the trailing partial sentence stays buffered.
+    """
+    text_buffer = connection_manager.get_text_buffer(session_id)
+    if not text_buffer.strip():
+        return
     
-    # Now check for real sentence endings
-    sentence_endings = ['.', '!', '?']
+    split = find_sentence_split(text_buffer) if split_at_sentence else 0
+    if split and text_buffer[split:].strip():
+        text_buffer = connection_manager.consume_text_buffer(session_id, split)
+    else:
+        # Clear the submitted text now so chunks arriving during generation start a new buffer
+        connection_manager.clear_text_buffer(session_id)
     
-    # Check if any true sentence endings remain after removing abbreviations
-    for ending in sentence_endings:
-        if ending in text_without_abbrevs:
-            return True
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Session %s processing: '%s...'", session_id, text_buffer[:50])
     
-    return False
+    # Generations run in parallel; the processor delivers results in submission order.
+    # Waiting for a slot backpressures this session's input while its backlog is full.
+    tts_processor = connection_manager.get_tts_processor(session_id)
+    seq = await tts_processor.reserve()
+    connection_manager.submit_task(
+        session_id,
+        tts_processor.submit(seq, generate_messages(session_id, text_buffer, seq))
+    )
 
 
-async def process_text_buffer(session_id: str, websocket: WebSocket):
-    """Process the current text buffer and send audio + alignment"""
+async def generate_messages(session_id: str, text_buffer: str, seq: int) -> AsyncIterator[bytes]:
+    """Generate audio + alignment for a text chunk, yielding an outbound frame per synthesized segment"""
     try:
-        text_buffer = connection_manager.get_text_buffer(session_id)
-        if not text_buffer.strip():
-            return
-            
-        logger.info(f"Session {session_id} processing: '{text_buffer[:50]}...'")
-        
-        # Generate audio and alignment
-        result = await tts_engine.generate_audio_with_alignment(text_buffer)
-        
-        if result:
-            # **KEY FIX**: Add full accumulated text to the result for proper caption display
-            # This ensures frontend gets complete text for caption rebuilding
-            session_data = connection_manager.session_data.get(session_id, {})
-            full_accumulated_text = session_data.get('full_text', text_buffer)
-            result['full_text'] = full_accumulated_text
+        first = True
+        async for result in tts_engine.generate_audio_stream(text_buffer):
+            # Send only this chunk's text, once; the client appends deltas (in seq order)
+            # to rebuild captions instead of receiving the whole transcript each time
+            if first:
+                result['text_delta'] = text_buffer
+                first = False
+            result['seq'] = seq
             
-            # Also include the current chunk's processed text for highlighting
+            # Also include the current segment's processed text for highlighting
             result['current_chunk_text'] = result.get('processed_text', text_buffer)
             
-            # Send result to client
-            await websocket.send_text(json.dumps(result))
-            logger.debug(f"Session {session_id} sent audio chunk with full_text: '{full_accumulated_text[:50]}...'")
-            
-            # Clear the processed text from buffer
-            connection_manager.clear_text_buffer(session_id)
-        
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Session %s generated audio chunk %s: '%s...'", session_id, seq, text_buffer[:50])
+            yield pack_message(result)
+    
     except Exception as e:
-        logger.error(f"Session {session_id} TTS processing error: {e}")
-        await websocket.send_text(json.dumps({"error": "TTS processing failed"}))
+        logger.error("Session %s TTS processing error: %s", session_id, e)
+        yield _ERR_TTS_FAILED
 
 
-async def process_remaining_text(session_id: str, websocket: WebSocket):
-    """Process any remaining text in buffer before closing"""
+async def process_remaining_text(session_id: str):
+    """Process any remaining text in buffer and wait for delivery before closing"""
     try:
-        text_buffer = connection_manager.get_text_buffer(session_id)
-        if text_buffer.strip():
-            await process_text_buffer(session_id, websocket)
+        await process_text_buffer(session_id)
+        await connection_manager.wait_until_sent(session_id)
     except Exception as e:
-        logger.error(f"Session {session_id} final processing error: {e}")
+        logger.error("Session %s final processing error: %s", session_id, e)
 
 
 @app.get("/health")
@@ -332,15 +434,31 @@ async def health_check():
     return {
         "status": "healthy",
         "tts_engine_ready": tts_engine is not None and tts_engine.is_ready(),
-        "active_connections": len(connection_manager.active_connections) if connection_manager else 0
+        "active_connections": connection_manager.get_active_count() if connection_manager else 0
     }
 
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        log_level="info",
-        reload=True
-    )
\ No newline at end of file
+    if os.getenv("TTS_RELOAD") == "1":
+        # Development: auto-reload on code changes (single worker, default loop)
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            log_level="info",
+            reload=True
+        )
+    else:
+        # TTS_UDS: listen on a unix socket behind a websocket-terminating frontend proxy
+        uds = os.getenv("TTS_UDS")
+        bind = {"uds": uds} if uds else {"host": "0.0.0.0", "port": 8000}
+        uvicorn.run(
+            "main:app",
+            **bind,
+            loop="uvloop",
+            http="httptools",
+            ws="websockets",
+            log_level="warning",
+            reload=False,
+            workers=int(os.getenv("WEB_CONCURRENCY", "1"))
+        )
\ No newline at end of file
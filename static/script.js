@@ -1,5 +1,95 @@
 
 
+/**
+ * Minimal MessagePack decoder for binary frames sent by the server.
+ * Supports the subset produced by msgpack.packb(..., use_bin_type=True):
+ * nil, booleans, ints, floats, str, bin (returned as Uint8Array), arrays and maps.
+ */
+function decodeMsgPack(buffer, byteOffset = 0, byteLength = buffer.byteLength - byteOffset) {
+    const view = new DataView(buffer, byteOffset, byteLength);
+    const bytes = new Uint8Array(buffer, byteOffset, byteLength);
+    const textDecoder = new TextDecoder();
+    let offset = 0;
+    
+    // Advance past a fixed-size field, returning the value read at its start
+    const take = (size, value) => {
+        offset += size;
+        return value;
+    };
+    const readStr = (length) => take(length, textDecoder.decode(bytes.subarray(offset, offset + length)));
+    const readBin = (length) => take(length, bytes.subarray(offset, offset + length));
+    const readArray = (length) => {
+        const value = new Array(length);
+        for (let i = 0; i < length; i++) {
+            value[i] = read();
+        }
+        return value;
+    };
+    const readMap = (length) => {
+        const value = {};
+        for (let i = 0; i < length; i++) {
+            const key = read();
+            value[key] = read();
+        }
+        return value;
+    };
+    
+    const read = () => {
+        const type = bytes[offset++];
+        if (type <= 0x7f) return type;                      // positive fixint
+        if (type <= 0x8f) return readMap(type & 0x0f);      // fixmap
+        if (type <= 0x9f) return readArray(type & 0x0f);    // fixarray
+        if (type <= 0xbf) return readStr(type & 0x1f);      // fixstr
+        if (type >= 0xe0) return type - 0x100;              // negative fixint
+        
+        switch (type) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xc4: return readBin(take(1, view.getUint8(offset)));
+            case 0xc5: return readBin(take(2, view.getUint16(offset)));
+            case 0xc6: return readBin(take(4, view.getUint32(offset)));
+            case 0xca: return take(4, view.getFloat32(offset));
+            case 0xcb: return take(8, view.getFloat64(offset));
+            case 0xcc: return take(1, view.getUint8(offset));
+            case 0xcd: return take(2, view.getUint16(offset));
+            case 0xce: return take(4, view.getUint32(offset));
+            case 0xcf: return take(8, Number(view.getBigUint64(offset)));
+            case 0xd0: return take(1, view.getInt8(offset));
+            case 0xd1: return take(2, view.getInt16(offset));
+            case 0xd2: return take(4, view.getInt32(offset));
+            case 0xd3: return take(8, Number(view.getBigInt64(offset)));
+            case 0xd9: return readStr(take(1, view.getUint8(offset)));
+            case 0xda: return readStr(take(2, view.getUint16(offset)));
+            case 0xdb: return readStr(take(4, view.getUint32(offset)));
+            case 0xdc: return readArray(take(2, view.getUint16(offset)));
+            case 0xdd: return readArray(take(4, view.getUint32(offset)));
+            case 0xde: return readMap(take(2, view.getUint16(offset)));
+            case 0xdf: return readMap(take(4, view.getUint32(offset)));
+            default:
+                throw new Error(`Unsupported MessagePack type: 0x${type.toString(16)}`);
+        }
+    };
+    
+    return read();
+}
+
+/**
+ * Split a binary frame into its messages. The server may batch several
+ * MessagePack messages into one frame, each prefixed with a big-endian u32 length.
+ */
+function decodeFrames(buffer) {
+    const view = new DataView(buffer);
+    const messages = [];
+    let offset = 0;
+    while (offset < buffer.byteLength) {
+        const length = view.getUint32(offset);
+        messages.push(decodeMsgPack(buffer, offset + 4, length));
+        offset += 4 + length;
+    }
+    return messages;
+}
+
 class TTSWebSocketClient {
     constructor() {
         console.log('🚀 TTSWebSocketClient constructor called');
@@ -14,6 +104,7 @@ class TTSWebSocketClient {
         
         // Track full text for captions
         this.fullText = '';
+        this.captionText = '';  // Rebuilt from server text_delta messages
         this.processedTextLength = 0;
         
         // Highlighting system
@@ -180,6 +271,7 @@ class TTSWebSocketClient {
             
             // Create WebSocket connection
             this.ws = new WebSocket(wsUrl);
+            this.ws.binaryType = 'arraybuffer';  // Server sends MessagePack binary frames
             
             // Set up event handlers
             this.ws.onopen = this.handleWebSocketOpen.bind(this);
@@ -215,7 +307,7 @@ class TTSWebSocketClient {
         // Initialize session with server using proper protocol
         // According to WebSocket protocol: first chunk should be " " (single space)
         this.log('Sending session initialization message...');
-        const success = this.sendWebSocketMessage({text: ' '});
+        const success = this.sendWebSocketMessage({type: 'text', text: ' '});
         if (!success) {
             this.log('❌ Failed to send initialization message');
         }
@@ -223,27 +315,31 @@ class TTSWebSocketClient {
     
     handleWebSocketMessage(event) {
         try {
-            const data = JSON.parse(event.data);
-            
-            this.log(`📥 Received: ${data.audio ? 'audio+alignment' : JSON.stringify(data).substring(0, 50)}`);
-            
-            // Handle server errors
-            if (data.error) {
-                this.log(`Server error: ${data.error}`);
-                return;
-            }
-            
-            // Process audio message
-            if (data.audio && data.alignment) {
-                this.processAudioMessage(data);
+            const messages = typeof event.data === 'string' ? [JSON.parse(event.data)] : decodeFrames(event.data);
+            for (const data of messages) {
+                this.handleServerMessage(data);
             }
-            
         } catch (error) {
             this.log(`Message processing error: ${error.message}`);
             // Don't close connection on message errors
         }
     }
     
+    handleServerMessage(data) {
+        this.log(`📥 Received: ${data.audio ? 'audio+alignment' : JSON.stringify(data).substring(0, 50)}`);
+        
+        // Handle server errors
+        if (data.error) {
+            this.log(`Server error: ${data.error}`);
+            return;
+        }
+        
+        // Process audio message
+        if (data.audio && data.alignment) {
+            this.processAudioMessage(data);
+        }
+    }
+    
     handleWebSocketClose(event) {
         this.log(`🔌 WebSocket closed: ${event.code} ${event.reason || 'No reason'}`);
         this.log(`Was clean: ${event.wasClean}`);
@@ -380,9 +476,14 @@ class TTSWebSocketClient {
                 this.queueAudioForPlayback(data.audio, data);
             }
             
+            // Server sends only the new text per chunk; accumulate it for captions
+            if (data.text_delta) {
+                this.captionText += data.text_delta;
+            }
+            
             // Update captions with highlighting
-            if (data.full_text || data.processed_text) {
-                this.updateCaptionsWithHighlighting(data.full_text || data.processed_text || '', data);
+            if (this.captionText || data.processed_text) {
+                this.updateCaptionsWithHighlighting(this.captionText || data.processed_text || '', data);
             }
             
             // Update UI
@@ -804,6 +905,7 @@ class TTSWebSocketClient {
             this.highlightingData = [];
             this.wordElements = [];
             this.globalStartTime = null;
+            this.captionText = '';
             
             this.log('Highlighting system reset - forced index reset');
             
@@ -851,7 +953,7 @@ class TTSWebSocketClient {
         this.resetHighlighting();
         
         // IMPORTANT: Send reset to server to clear accumulated text
-        this.sendWebSocketMessage({reset: true});
+        this.sendWebSocketMessage({type: 'reset'});
         this.log('Example clicked - server session reset');
         
         // Start latency measurement from example button click
@@ -881,11 +983,11 @@ class TTSWebSocketClient {
             
             // Send text as a single chunk to prevent fragmented processing
             // This ensures proper caption display for example texts
-            this.sendWebSocketMessage({text: text});
+            this.sendWebSocketMessage({type: 'text', text: text});
             this.sentTextLength = text.length;
             
             // Force flush to complete the processing
-            this.sendWebSocketMessage({flush: true});
+            this.sendWebSocketMessage({type: 'flush'});
             
         } catch (error) {
             this.log(`Error sending example text: ${error.message}`);
@@ -910,7 +1012,7 @@ class TTSWebSocketClient {
             // Reset highlighting system for new session
             this.resetHighlighting();
             // Signal server to reset session
-            this.sendWebSocketMessage({reset: true});
+            this.sendWebSocketMessage({type: 'reset'});
             this.log('New typing session started - captions cleared');
         }
         
@@ -934,8 +1036,8 @@ class TTSWebSocketClient {
             
             if (hasSentenceEnd) {
                 // Send immediately on sentence completion
-                this.sendWebSocketMessage({text: newText});
-                this.sendWebSocketMessage({flush: true});
+                this.sendWebSocketMessage({type: 'text', text: newText});
+                this.sendWebSocketMessage({type: 'flush'});
                 this.sentTextLength = currentText.length;
                 this.stats.charCount = currentText.length;
                 this.fullText = currentText;
@@ -946,7 +1048,7 @@ class TTSWebSocketClient {
                 this.inputTimeout = setTimeout(() => {
                     if (this.textInput.value.substring(this.sentTextLength)) {
                         const pendingText = this.textInput.value.substring(this.sentTextLength);
-                        this.sendWebSocketMessage({text: pendingText});
+                        this.sendWebSocketMessage({type: 'text', text: pendingText});
                         this.sentTextLength = this.textInput.value.length;
                         this.stats.charCount = this.textInput.value.length;
                         this.fullText = this.textInput.value;
@@ -958,7 +1060,7 @@ class TTSWebSocketClient {
                 // But avoid sending single spaces that cause TTS fragmentation
                 if ((newText.length >= 8 || (newText.includes(' ') && newText.trim().length > 0)) && newText.trim() !== '') {
                     clearTimeout(this.inputTimeout);
-                    this.sendWebSocketMessage({text: newText});
+                    this.sendWebSocketMessage({type: 'text', text: newText});
                     this.sentTextLength = currentText.length;
                     this.stats.charCount = currentText.length;
                     this.fullText = currentText;
@@ -1052,14 +1154,14 @@ class TTSWebSocketClient {
         
         if (remainingText.trim()) {
             this.log(`Sending remaining text before flush: "${remainingText}"`);
-            this.sendWebSocketMessage({text: remainingText});
+            this.sendWebSocketMessage({type: 'text', text: remainingText});
             this.sentTextLength = currentText.length;
             this.stats.charCount = currentText.length;
             this.fullText = currentText;
         }
         
         // Then flush to process all buffered text
-        this.sendWebSocketMessage({flush: true});
+        this.sendWebSocketMessage({type: 'flush'});
     }
     
     toggleLiveMode() {
@@ -1182,7 +1284,7 @@ class TTSWebSocketClient {
         // Reset highlighting system
         this.resetHighlighting();
         
-        this.sendWebSocketMessage({reset: true});
+        this.sendWebSocketMessage({type: 'reset'});
         
         // Reset tracking
         this.sentTextLength = 0;
@@ -1207,7 +1309,7 @@ class TTSWebSocketClient {
     streamNextChunk() {
         if (this.currentChunkIndex >= this.streamingChunks.length) {
             // All chunks sent, finalize
-            this.sendWebSocketMessage({flush: true});
+            this.sendWebSocketMessage({type: 'flush'});
             this.streamingMode = false;
             this.updateProgressBar(this.totalEstimatedDuration, this.totalEstimatedDuration);
             this.log('Streaming TTS completed - all chunks sent');
@@ -1222,7 +1324,7 @@ class TTSWebSocketClient {
         this.log(`Streaming chunk ${this.currentChunkIndex + 1}/${this.streamingChunks.length}: "${chunkToSend}"`);
         
         // Send chunk immediately for TTS
-        this.sendWebSocketMessage({text: chunkToSend});
+        this.sendWebSocketMessage({type: 'text', text: chunkToSend});
         this.sentTextLength += chunkToSend.length;
         
         // Update progress estimation
@@ -1279,7 +1381,7 @@ class TTSWebSocketClient {
         this.updateProgressBar(0, 0);
         
         // Clear server session
-        this.sendWebSocketMessage({reset: true});
+        this.sendWebSocketMessage({type: 'reset'});
         
         // Reset mode if needed
         if (this.isLiveMode) {
@@ -1331,9 +1433,13 @@ class TTSWebSocketClient {
                 });
             }
             
+            if (message.text_delta) {
+                this.captionText += message.text_delta;
+            }
+            
             // Update captions with error handling
             try {
-                const captionText = message.full_text || message.processed_text || (message.alignment ? message.alignment.chars.join('') : '');
+                const captionText = this.captionText || message.processed_text || (message.alignment ? message.alignment.chars.join('') : '');
                 if (captionText) {
                     this.updateCaptions(captionText);
                 }
@@ -1344,7 +1450,7 @@ class TTSWebSocketClient {
             // Update streaming progress if in streaming mode with error handling
             try {
                 if (this.streamingMode && this.totalEstimatedDuration > 0) {
-                    const processedText = message.full_text || '';
+                    const processedText = this.captionText;
                     const estimatedCurrent = this.estimateAudioDuration(processedText);
                     this.updateProgressBar(Math.min(estimatedCurrent, this.totalEstimatedDuration), this.totalEstimatedDuration);
                 }
@@ -1366,7 +1472,7 @@ class TTSWebSocketClient {
         }
     }
     
-    async queueAudioForPlayback(audioBase64, data) {
+    async queueAudioForPlayback(audioBytes, data) {
         try {
             // Check if audio context is available
             if (!this.audioContext) {
@@ -1385,15 +1491,8 @@ class TTSWebSocketClient {
                 }
             }
             
-            // Decode base64 to binary
-            const binaryString = atob(audioBase64);
-            const bytes = new Uint8Array(binaryString.length);
-            for (let i = 0; i < binaryString.length; i++) {
-                bytes[i] = binaryString.charCodeAt(i);
-            }
-            
-            // Convert to audio buffer (44.1 kHz, 16-bit PCM, mono)
-            const audioBuffer = await this.pcmToAudioBuffer(bytes, 44100, 1);
+            // Convert raw PCM bytes to audio buffer (44.1 kHz, 16-bit PCM, mono)
+            const audioBuffer = await this.pcmToAudioBuffer(audioBytes, 44100, 1);
             
             // Add to queue with associated data
             this.audioQueue.push({ audioBuffer, data });
@@ -1419,7 +1518,7 @@ class TTSWebSocketClient {
         }
         
         // Convert 16-bit PCM data to Float32Array
-        // Expected format: 44.1 kHz, 16-bit, mono PCM encoded as Base64
+        // Expected format: 44.1 kHz, 16-bit, mono PCM as raw bytes
         const samples = pcmData.length / 2; // 16-bit = 2 bytes per sample
         const audioBuffer = this.audioContext.createBuffer(channels, samples, sampleRate);
         const channelData = audioBuffer.getChannelData(0);
@@ -4,97 +4,510 @@ Handles kokoro TTS integration and character-level alignment generation
 """
 
 import asyncio
-import base64
+import functools
+import itertools
 import logging
+import math
+import multiprocessing
+import os
 import re
-from typing import Dict, List, Tuple, Optional, Any
-from collections import defaultdict
+import struct
+import threading
+from typing import Dict, List, Tuple, Optional, Any, AsyncIterator, Awaitable, Callable
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 import json
 
 import numpy as np
-import torch
-import torchaudio
-from scipy import signal
 from fastapi import WebSocket
-import soundfile as sf
 
-# Kokoro TTS imports
-from kokoro import KPipeline
+# torch, scipy and kokoro are imported where first used, so importing this module
+# (e.g. a server process that only drives TTS_WORKERS processes) stays cheap
 
 logger = logging.getLogger(__name__)
 
 
+# Precompiled text-processing patterns
+_WHITESPACE_RE = re.compile(r'\s+')
+_WORD_RE = re.compile(r'\S+')
+
+# Only texts up to this length (prompts, short sentences) go through the normalization cache
+_NORMALIZE_CACHE_MAX_CHARS = 256
+
+# Math notation: fraction, power, subscript and scientific-notation operators in one
+# pass. Operands are matched by lookaround so chained operators (x_1^2) share them.
+_MATH_OPERATOR_RE = re.compile(
+    r'(?P<over>(?<=\d)/(?=\d))'
+    r'|(?P<power>(?<=[a-zA-Z0-9])\^(?=[a-zA-Z0-9]))'
+    r'|(?P<subscript>(?<=[a-zA-Z0-9])_(?=[a-zA-Z0-9]))'
+    r'|(?P<sci>(?<=[0-9.])[eE](?=[+-]?[0-9]))'
+)
+_MATH_OPERATOR_SPOKEN = {
+    'over': ' over ',
+    'power': ' to the power of ',
+    'subscript': ' subscript ',
+    'sci': ' times 10 to the power of ',
+}
+# Mathematical minus, classified in one pass: between whole numbers ("5 - 3"), after a
+# single-letter variable ("x - y", "x-2"), or standalone with spaces (" - "). The right
+# operand is only looked ahead at, so chains (1-2-3) share it.
+_MINUS_RE = re.compile(
+    r'\b(?:(?P<number>\d+)|(?P<variable>[a-zA-Z]))\s*-\s*'
+    r'(?(number)(?=\d+\b)|(?=[a-zA-Z0-9]\b))'
+    r'|\s-\s'
+)
+
+# LaTeX expressions: one alternation, dispatched on the name of the matched branch
+_LATEX_RE = re.compile(
+    r'(?P<frac>\\frac\{(?P<frac_num>[^}]+)\}\{(?P<frac_den>[^}]+)\})'
+    r'|(?P<root>\\sqrt\[(?P<root_n>[^]]+)\]\{(?P<root_x>[^}]+)\})'
+    r'|(?P<sqrt>\\sqrt\{(?P<sqrt_x>[^}]+)\})'
+    r'|(?P<sum>\\sum_\{(?P<sum_from>[^}]+)\}\^\{(?P<sum_to>[^}]+)\})'
+    r'|(?P<int>\\int_\{(?P<int_from>[^}]+)\}\^\{(?P<int_to>[^}]+)\})'
+    r'|(?P<lim>\\lim_\{(?P<lim_var>[^}]+)\\to\s*(?P<lim_to>[^}]+)\})'
+    r'|(?P<power>(?P<power_base>[a-zA-Z0-9]+)\^\{(?P<power_exp>[^}]+)\})'
+    r'|(?P<subscript>(?P<subscript_base>[a-zA-Z0-9]+)_\{(?P<subscript_idx>[^}]+)\})'
+)
+_LATEX_SPOKEN = {
+    'frac': r'\g<frac_num> over \g<frac_den>',
+    'root': r'\g<root_n>th root of \g<root_x>',
+    'sqrt': r'square root of \g<sqrt_x>',
+    'sum': r'sum from \g<sum_from> to \g<sum_to>',
+    'int': r'integral from \g<int_from> to \g<int_to>',
+    'lim': r'limit as \g<lim_var> approaches \g<lim_to>',
+    'power': r'\g<power_base> to the power of \g<power_exp>',
+    'subscript': r'\g<subscript_base> subscript \g<subscript_idx>',
+}
+_LATEX_COMMAND_RE = re.compile(r'\\[a-zA-Z]+')
+# Every LaTeX rewrite needs a backslash command or a braced ^{..} / _{..}
+_LATEX_DETECT_RE = re.compile(r'\\|[\^_]\{')
+
+
+_FRAME_HEADER = struct.Struct(">I")
+
+
+def encode_frames(payloads: List[bytes]) -> bytes:
+    """Join messages into one websocket frame, each prefixed with its u32 length"""
+    pack = _FRAME_HEADER.pack
+    return b"".join([part for payload in payloads for part in (pack(len(payload)), payload)])
+
+
+@dataclass(slots=True)
+class PhonemeTimings:
+    """Phoneme timings as parallel arrays: phonemes[i] spans starts_ms[i] to ends_ms[i]"""
+    
+    phonemes: List[str]
+    starts_ms: np.ndarray
+    ends_ms: np.ndarray
+    
+    @classmethod
+    def from_chunks(cls, phonemes: List[str], starts_ms: List[np.ndarray], ends_ms: List[np.ndarray]) -> "PhonemeTimings":
+        """Build from per-chunk time arrays, concatenated once"""
+        if not starts_ms:
+            return cls(phonemes, np.empty(0), np.empty(0))
+        return cls(phonemes, np.concatenate(starts_ms), np.concatenate(ends_ms))
+    
+    def __len__(self) -> int:
+        return len(self.phonemes)
+    
+    @property
+    def total_ms(self) -> float:
+        """End time of the last phoneme (0 when empty)"""
+        return float(self.ends_ms[-1]) if len(self.ends_ms) else 0.0
+
+
+@dataclass(slots=True)
+class Session:
+    """Per-connection streaming state"""
+    
+    # Text buffer awaiting TTS (bounded by the flush threshold, so kept as a str)
+    text_buffer: str = ""
+    # Stripped bounds of text_buffer (buffer_start is None until non-space text arrives)
+    buffer_start: Optional[int] = None
+    buffer_end: int = 0
+    # Whether sentence punctuation arrived since the buffer was last cleared
+    has_punct: bool = False
+    # How far text_buffer has been checked for sentence endings
+    scanned_upto: int = 0
+    is_active: bool = True
+    created_at: float = 0.0
+    # Loop time of the last inbound activity, used to reap idle sessions
+    last_active_at: float = 0.0
+    out_queue: Optional[asyncio.Queue] = None
+    sender_task: Optional[asyncio.Task] = None
+    tts_processor: Optional["OrderlyParallelTTS"] = None
+    pending_tasks: set = field(default_factory=set)
+
+
 class ConnectionManager:
     """Manages WebSocket connections and session state"""
     
-    def __init__(self):
+    __slots__ = ('active_connections', 'sessions', '_active_count', 'out_queue_size',
+                 'batch_after_messages', 'batch_threshold_bytes', 'idle_timeout', '_reaper_task')
+    
+    def __init__(self, out_queue_size: int = 4, batch_after_messages: int = 3,
+                 batch_threshold_bytes: int = 16 * 1024, idle_timeout: float = 15 * 60):
         self.active_connections: Dict[str, WebSocket] = {}
-        self.session_data: Dict[str, Dict[str, Any]] = {}
+        self.sessions: Dict[str, Session] = {}
+        self._active_count = 0
+        # Bounded so a slow client backpressures generation instead of buffering audio
+        self.out_queue_size = out_queue_size
+        # Under backlog, sends after the first few are coalesced into one websocket frame
+        self.batch_after_messages = batch_after_messages
+        self.batch_threshold_bytes = batch_threshold_bytes
+        # Sessions with no inbound text for this many seconds are closed by the reaper
+        self.idle_timeout = idle_timeout
+        self._reaper_task: Optional[asyncio.Task] = None
     
     async def connect(self, websocket: WebSocket, session_id: str):
         """Register a new WebSocket connection"""
+        if session_id not in self.active_connections:
+            self._active_count += 1
         self.active_connections[session_id] = websocket
-        self.session_data[session_id] = {
-            "text_buffer": "",
-            "full_text": "",
-            "is_active": True,
-            "created_at": asyncio.get_event_loop().time()
-        }
-        logger.info(f"Session {session_id} connected")
+        
+        # Outbound frames are sent by a dedicated task so generation never blocks receiving
+        out_queue = asyncio.Queue(maxsize=self.out_queue_size)
+        now = asyncio.get_event_loop().time()
+        self.sessions[session_id] = Session(
+            created_at=now,
+            last_active_at=now,
+            out_queue=out_queue,
+            sender_task=asyncio.create_task(self._sender_loop(session_id, websocket, out_queue)),
+            tts_processor=OrderlyParallelTTS(functools.partial(self.enqueue_message, session_id))
+        )
+        if self._reaper_task is None:
+            self._reaper_task = asyncio.create_task(self._reaper())
+        logger.info("Session %s connected", session_id)
     
     async def disconnect(self, session_id: str):
         """Remove a WebSocket connection"""
         if session_id in self.active_connections:
             del self.active_connections[session_id]
-        if session_id in self.session_data:
-            del self.session_data[session_id]
-        logger.info(f"Session {session_id} disconnected")
+            self._active_count -= 1
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            for task in session.pending_tasks:
+                task.cancel()
+            session.sender_task.cancel()
+        logger.info("Session %s disconnected", session_id)
+    
+    async def _reaper(self):
+        """Periodically close sessions idle longer than idle_timeout"""
+        while True:
+            await asyncio.sleep(self.idle_timeout / 4)
+            cutoff = asyncio.get_event_loop().time() - self.idle_timeout
+            idle = [
+                session_id for session_id, session in self.sessions.items()
+                if session.last_active_at < cutoff and not session.pending_tasks
+            ]
+            for session_id in idle:
+                logger.info("Session %s idle for over %ss, closing", session_id, self.idle_timeout)
+                websocket = self.active_connections.get(session_id)
+                await self.disconnect(session_id)
+                if websocket is not None:
+                    try:
+                        await websocket.close(code=1001)
+                    except Exception as e:
+                        logger.debug("Session %s close failed: %s", session_id, e)
+    
+    async def _sender_loop(self, session_id: str, websocket: WebSocket, out_queue: asyncio.Queue):
+        """Send queued messages to the client in order, batching under backlog"""
+        sent_in_burst = 0
+        while True:
+            if out_queue.empty():
+                sent_in_burst = 0  # Idle: the next message starts a new burst
+            batch = [await out_queue.get()]
+            if sent_in_burst >= self.batch_after_messages:
+                pending_bytes = len(batch[0])
+                while pending_bytes < self.batch_threshold_bytes:
+                    if out_queue.empty():
+                        await asyncio.sleep(0)  # Let blocked producers enqueue
+                        if out_queue.empty():
+                            break
+                    payload = out_queue.get_nowait()
+                    batch.append(payload)
+                    pending_bytes += len(payload)
+            try:
+                await websocket.send_bytes(encode_frames(batch))
+            except Exception as e:
+                logger.error("Session %s failed to send frame: %s", session_id, e)
+            finally:
+                sent_in_burst += 1
+                for _ in batch:
+                    out_queue.task_done()
+    
+    def has_session(self, session_id: str) -> bool:
+        """Check whether the session is still registered (False once disconnected or reaped)"""
+        return session_id in self.sessions
+    
+    def get_active_count(self) -> int:
+        """Get number of active connections (O(1), maintained on connect/disconnect)"""
+        return self._active_count
+    
+    def submit_task(self, session_id: str, coro):
+        """Run a background coroutine for the session, cancelled on disconnect"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            coro.close()
+            return
+        pending_tasks = session.pending_tasks
+        task = asyncio.create_task(coro)
+        pending_tasks.add(task)
+        task.add_done_callback(pending_tasks.discard)
+    
+    def get_tts_processor(self, session_id: str) -> "OrderlyParallelTTS":
+        """Get the parallel, order-preserving TTS processor for a session"""
+        return self.sessions[session_id].tts_processor
+    
+    async def enqueue_message(self, session_id: str, payload: bytes):
+        """Queue an encoded frame for sending to the client"""
+        session = self.sessions.get(session_id)
+        if session is not None:
+            await session.out_queue.put(payload)
+    
+    async def wait_until_sent(self, session_id: str):
+        """Wait for in-flight generation and queued frames to be delivered"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return
+        if session.pending_tasks:
+            await asyncio.gather(*session.pending_tasks, return_exceptions=True)
+        await session.out_queue.join()
+    
+    async def reset_session(self, session_id: str):
+        """Abandon in-flight generation and unsent frames, then start a fresh stream"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return
+        pending_tasks = list(session.pending_tasks)
+        for task in pending_tasks:
+            task.cancel()
+        if pending_tasks:
+            await asyncio.gather(*pending_tasks, return_exceptions=True)
+        out_queue = session.out_queue
+        while not out_queue.empty():
+            out_queue.get_nowait()
+            out_queue.task_done()
+        # Cancelled jobs never free their reserved slots, so the old processor can't be reused
+        session.tts_processor = OrderlyParallelTTS(functools.partial(self.enqueue_message, session_id))
+        await self.initialize_session(session_id)
     
     async def initialize_session(self, session_id: str):
         """Initialize session for new stream"""
-        if session_id in self.session_data:
-            self.session_data[session_id]["text_buffer"] = ""
-            self.session_data[session_id]["full_text"] = ""  # Also clear full_text for new sessions
-            self.session_data[session_id]["is_active"] = True
-            logger.debug(f"Session {session_id} initialized - buffers cleared")
+        session = self.sessions.get(session_id)
+        if session is not None:
+            self._reset_buffer_state(session)
+            session.is_active = True
+            session.last_active_at = asyncio.get_event_loop().time()
+            logger.debug("Session %s initialized - buffers cleared", session_id)
     
     async def add_text_chunk(self, session_id: str, text: str):
         """Add text chunk to session buffer"""
-        if session_id in self.session_data:
-            self.session_data[session_id]["text_buffer"] += text
-            # Also maintain full text for captions
-            if "full_text" not in self.session_data[session_id]:
-                self.session_data[session_id]["full_text"] = ""
-            self.session_data[session_id]["full_text"] += text
+        session = self.sessions.get(session_id)
+        if session is not None:
+            self._append_to_buffer(session, text)
+            session.last_active_at = asyncio.get_event_loop().time()
     
     def get_text_buffer(self, session_id: str) -> str:
         """Get current text buffer for session"""
-        if session_id in self.session_data:
-            return self.session_data[session_id]["text_buffer"]
-        return ""
+        session = self.sessions.get(session_id)
+        return session.text_buffer if session is not None else ""
+    
+    def get_buffer_len(self, session_id: str) -> int:
+        """Get length of the current text buffer, excluding surrounding whitespace"""
+        session = self.sessions.get(session_id)
+        if session is None or session.buffer_start is None:
+            return 0
+        return session.buffer_end - session.buffer_start
+    
+    def has_punctuation(self, session_id: str) -> bool:
+        """Check if any sentence punctuation was added since the buffer was last cleared"""
+        session = self.sessions.get(session_id)
+        return session is not None and session.has_punct
+    
+    def get_unscanned_tail(self, session_id: str, lookback: int = 20) -> str:
+        """
+        Get the part of the text buffer not yet checked for sentence endings
+        
+        Includes `lookback` characters of already-scanned text (widened to a
+        word start) so abbreviations split across chunks are still recognized.
+        """
+        session = self.sessions.get(session_id)
+        if session is None:
+            return ""
+        text_buffer = session.text_buffer
+        
+        start = max(0, session.scanned_upto - lookback)
+        while start > 0 and not text_buffer[start - 1].isspace():
+            start -= 1
+        
+        session.scanned_upto = len(text_buffer)
+        return text_buffer[start:]
     
     def clear_text_buffer(self, session_id: str):
         """Clear text buffer for session"""
-        if session_id in self.session_data:
-            self.session_data[session_id]["text_buffer"] = ""
+        session = self.sessions.get(session_id)
+        if session is not None:
+            self._reset_buffer_state(session)
+    
+    def consume_text_buffer(self, session_id: str, length: int) -> str:
+        """Remove and return the first `length` characters of the text buffer"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return ""
+        text_buffer = session.text_buffer
+        self._reset_buffer_state(session)
+        self._append_to_buffer(session, text_buffer[length:])
+        return text_buffer[:length]
+    
+    @staticmethod
+    def _append_to_buffer(session: Session, text: str):
+        """Append to text buffer, tracking its stripped bounds and punctuation"""
+        # Track stripped buffer bounds incrementally so length checks stay O(1)
+        stripped = text.strip()
+        if stripped:
+            offset = len(session.text_buffer)
+            if session.buffer_start is None:
+                session.buffer_start = offset + len(text) - len(text.lstrip())
+            session.buffer_end = offset + len(text.rstrip())
+        if not session.has_punct:
+            session.has_punct = any(c in text for c in '.!?')
+        
+        session.text_buffer += text
+    
+    @staticmethod
+    def _reset_buffer_state(session: Session):
+        """Reset text buffer and its tracked length/punctuation state"""
+        session.text_buffer = ""
+        session.buffer_start = None
+        session.buffer_end = 0
+        session.has_punct = False
+        session.scanned_upto = 0
     
     async def cleanup_all_connections(self):
         """Clean up all active connections"""
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            self._reaper_task = None
         for session_id in list(self.active_connections.keys()):
             await self.disconnect(session_id)
 
 
+class OrderlyParallelTTS:
+    """
+    Runs TTS generation jobs concurrently while emitting results in submission order
+    
+    Each job gets a monotonically increasing index and may produce several results.
+    The job at the head streams its results straight to `emit`; later jobs park
+    theirs in a pending map until every earlier index has finished.
+    
+    A slot is held from `reserve` until the job's results have all been emitted, so
+    with a slow reader at most `max_concurrent` jobs are running or parked.
+    """
+    
+    __slots__ = ('_emit', '_semaphore', '_pending', '_finished', '_next_submit', '_next_emit', '_draining')
+    
+    def __init__(self, emit: Callable[[Any], Awaitable[None]], max_concurrent: int = 3):
+        self._emit = emit
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._pending: Dict[int, List[Any]] = {}
+        self._finished: set = set()
+        self._next_submit = 0
+        self._next_emit = 0
+        self._draining = False
+    
+    async def reserve(self) -> int:
+        """Wait for a free job slot and return the next submission index"""
+        await self._semaphore.acquire()
+        index = self._next_submit
+        self._next_submit += 1
+        return index
+    
+    async def submit(self, index: int, job: AsyncIterator[Any]):
+        """Run a reserved job and emit its results in order (None is skipped)"""
+        try:
+            async for result in job:
+                if result is not None:
+                    self._pending.setdefault(index, []).append(result)
+                    await self._drain()
+        except Exception as e:
+            logger.error("TTS job %s failed: %s", index, e)
+        finally:
+            await job.aclose()  # Release what the job holds (e.g. the kokoro stream) promptly on cancel
+        
+        self._finished.add(index)
+        await self._drain()
+    
+    async def _drain(self):
+        """Emit parked results of the head job, advancing past jobs that have finished"""
+        # A single drainer keeps emits ordered even if emit awaits
+        if self._draining:
+            return
+        self._draining = True
+        try:
+            while True:
+                results = self._pending.pop(self._next_emit, None)
+                if results:
+                    for result in results:
+                        await self._emit(result)
+                elif self._next_emit in self._finished:
+                    self._finished.discard(self._next_emit)
+                    self._next_emit += 1
+                    self._semaphore.release()  # Fully emitted: free its slot
+                else:
+                    break
+        finally:
+            self._draining = False
+
+
 class TTSEngine:
     """Main TTS engine using kokoro library"""
     
-    def __init__(self):
+    __slots__ = ('pipeline', 'device', 'compile_model', 'kokoro_sample_rate', 'target_sample_rate',
+                 'sample_rate', 'ready', 'lang_code', 'voice', '_pipeline_lock',
+                 '_resample_up', '_resample_down', '_resample_filter',
+                 '_audio_lru', '_audio_lru_bytes', '_audio_cache_bytes', '_encode_sem',
+                 '_generation_sem')
+    
+    def __init__(self, audio_cache_bytes: int = 32 * 1024 * 1024, compile_model: bool = False,
+                 concurrency: int = 4):
         self.pipeline = None
+        self.device = None  # Picked in initialize: 'cuda' when available, else 'cpu'
+        self.compile_model = compile_model  # torch.compile the kokoro model (CUDA only)
         self.kokoro_sample_rate = 24000  # Kokoro native sample rate
         self.target_sample_rate = 44100  # Output format: 44.1 kHz, 16-bit, mono PCM
         self.sample_rate = self.target_sample_rate  # For external compatibility
         self.ready = False
         self.lang_code = 'a'  # American English
         self.voice = 'af_heart'  # Default voice
+        # kokoro chunks are pulled from worker threads; one at a time through the pipeline
+        self._pipeline_lock = threading.Lock()
+        
+        # Polyphase resampling factors (24000 -> 44100 is 147/80) and low-pass filter,
+        # designed once the same way resample_poly would on every call
+        rate_gcd = math.gcd(self.target_sample_rate, self.kokoro_sample_rate)
+        self._resample_up = self.target_sample_rate // rate_gcd
+        self._resample_down = self.kokoro_sample_rate // rate_gcd
+        max_rate = max(self._resample_up, self._resample_down)
+        from scipy import signal
+        self._resample_filter = signal.firwin(
+            20 * max_rate + 1, 1.0 / max_rate, window=('kaiser', 5.0)
+        ).astype(np.float32)
+        
+        # Finished results by (voice, processed text, streamed) so repeated prompts skip kokoro;
+        # each entry is the list of segments it was emitted as (one for the batch path),
+        # evicted LRU by audio bytes
+        self._audio_lru: OrderedDict[Tuple[str, str, bool], List[Dict[str, Any]]] = OrderedDict()
+        self._audio_lru_bytes = 0
+        self._audio_cache_bytes = audio_cache_bytes
+        
+        # Bounds concurrent model steps across all sessions; held per chunk, never while a
+        # caller consumes results, so slow readers can't starve other sessions
+        self._generation_sem = asyncio.Semaphore(concurrency)
+        
+        # Resampling and int16 conversion run in worker threads, at most one per CPU
+        self._encode_sem = asyncio.Semaphore(os.cpu_count() or 1)
     
     async def initialize(self):
         """Initialize kokoro TTS pipeline"""
@@ -102,17 +515,33 @@ class TTSEngine:
             logger.info("Loading kokoro TTS pipeline...")
             
             # Initialize kokoro pipeline
-            self.pipeline = KPipeline(lang_code=self.lang_code)
+            import torch
+            from kokoro import KPipeline
+            self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+            self.pipeline = KPipeline(lang_code=self.lang_code, device=self.device)
+            if self.device == 'cuda':
+                torch.backends.cudnn.benchmark = True
+                if self.compile_model:
+                    self._compile_pipeline_model()
             
             self.ready = True
-            logger.info(f"Kokoro TTS pipeline initialized successfully (lang: {self.lang_code}, voice: {self.voice})")
+            logger.info("Kokoro TTS pipeline initialized successfully (lang: %s, voice: %s)", self.lang_code, self.voice)
             
         except Exception as e:
-            logger.error(f"Failed to initialize kokoro TTS pipeline: {e}")
+            logger.error("Failed to initialize kokoro TTS pipeline: %s", e)
             # Fall back to mock for development
             await self._mock_initialize()
             raise
     
+    def _compile_pipeline_model(self):
+        """Compile kokoro's model with CUDA graphs; falls back to eager on failure"""
+        import torch
+        try:
+            self.pipeline.model = torch.compile(self.pipeline.model, mode="reduce-overhead")
+            logger.info("Kokoro model compiled (reduce-overhead)")
+        except Exception as e:
+            logger.warning("torch.compile failed, running eager: %s", e)
+    
     async def _mock_initialize(self):
         """Mock initialization for development/fallback"""
         # Simulate model loading time
@@ -130,7 +559,7 @@ class TTSEngine:
         Generate audio and character alignment for given text
         
         Returns:
-            Dict with 'audio' (base64), 'alignment' (timing data), and 'word_alignment'
+            Dict with 'audio' (raw PCM bytes), 'alignment' (timing data), and 'word_alignment'
         """
         try:
             if not self.ready:
@@ -145,62 +574,175 @@ class TTSEngine:
             if not processed_text.strip():
                 return None
             
-            logger.info(f"Generating audio for: '{processed_text[:50]}...'")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Generating audio for: '%s...'", processed_text[:50])
             start_time = asyncio.get_event_loop().time()
             
-            # Step 1: Generate audio with phoneme timings (optimized)
-            audio_data, phoneme_timings = await self._generate_audio_with_phoneme_timings(processed_text)
-            
-            # Step 2: Generate word-level alignment based on processed text
-            word_alignments = self._generate_word_alignment(processed_text, phoneme_timings)
+            cached = self._audio_cache_get(processed_text, original_text, streamed=False)
+            if cached is not None:
+                logger.debug("Audio cache hit for: '%s'", processed_text)
+                return cached[0]
             
-            # Step 3: Generate character-level alignment (for compatibility)
-            char_alignments = self._generate_character_alignment(processed_text, phoneme_timings)
-            
-            # Step 4: Convert audio to base64
-            audio_base64 = self._audio_to_base64(audio_data)
+            async with self._generation_sem:
+                # Step 1: Generate audio with phoneme timings (optimized)
+                audio_data, phoneme_timings = await self._generate_audio_with_phoneme_timings(processed_text)
+                
+                # Steps 2-5: Alignment, PCM conversion and output formatting
+                result = await self._build_result(original_text, processed_text, audio_data, phoneme_timings)
+            self._audio_cache_put(processed_text, [result], streamed=False)
             
             generation_time = (asyncio.get_event_loop().time() - start_time) * 1000
-            logger.info(f"Audio generation completed in {generation_time:.1f}ms")
-            
-            # Step 5: Format output with both original and processed text
-            result = {
-                "audio": audio_base64,
-                "original_text": original_text,
-                "processed_text": processed_text,
-                "alignment": {
-                    "chars": list(processed_text),
-                    "char_start_times_ms": [int(align["start_ms"]) for align in char_alignments],
-                    "char_durations_ms": [int(align["duration_ms"]) for align in char_alignments]
-                },
-                "word_alignment": {
-                    "words": [w["word"] for w in word_alignments],
-                    "word_start_times_ms": [int(w["start_ms"]) for w in word_alignments],
-                    "word_durations_ms": [int(w["duration_ms"]) for w in word_alignments]
-                },
-                "full_text": processed_text  # Use processed text for captions
-            }
-            
-            logger.debug(f"Generated audio chunk: {len(audio_base64)} bytes, {len(char_alignments)} characters, {len(word_alignments)} words")
-            return result
-            
+            logger.info("Audio generation completed in %.1fms", generation_time)
+            return dict(result)  # Callers may annotate it; keep the cached copy clean
+        
         except Exception as e:
-            logger.error(f"Audio generation failed: {e}")
+            logger.error("Audio generation failed: %s", e)
             return None
     
+    async def generate_audio_stream(self, text: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate audio and alignment per kokoro chunk, yielding each as soon as it is synthesized
+        
+        Yields:
+            Dicts shaped like generate_audio_with_alignment's result, timed relative to the chunk
+        """
+        if not self.ready:
+            raise RuntimeError("TTS Engine not initialized")
+        
+        if isinstance(self.pipeline, str):  # Mock mode
+            result = await self.generate_audio_with_alignment(text)
+            if result:
+                yield result
+            return
+        
+        processed_text = self._clean_text(text, text)
+        if not processed_text.strip():
+            return
+        
+        cached = self._audio_cache_get(processed_text, text, streamed=True)
+        if cached is not None:
+            logger.debug("Audio cache hit for: '%s'", processed_text)
+            for segment in cached:
+                yield segment
+            return
+        
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Streaming audio for: '%s...'", processed_text[:50])
+        start_time = asyncio.get_event_loop().time()
+        
+        # kokoro's generator is synchronous; pull each chunk in a worker thread so
+        # synthesis doesn't block the event loop
+        chunks = self.pipeline(processed_text, voice=self.voice, speed=1.0)
+        segments = []
+        for i in itertools.count():
+            async with self._generation_sem:
+                chunk = await asyncio.to_thread(self._next_chunk, chunks)
+                if chunk is None:
+                    break
+                graphemes, phonemes, audio = chunk
+                if i == 0:
+                    logger.info("First audio chunk in %.1fms", (asyncio.get_event_loop().time() - start_time) * 1000)
+                
+                phoneme_strs, starts, ends = [], [], []
+                self._append_phoneme_timings(phoneme_strs, starts, ends, phonemes, len(audio), 0.0)
+                phoneme_timings = PhonemeTimings.from_chunks(phoneme_strs, starts, ends)
+                segment = await self._build_result(text, graphemes, np.asarray(audio, dtype=np.float32), phoneme_timings)
+            segments.append(segment)
+            yield dict(segment)
+        
+        # Only utterances streamed to the end are cached
+        self._audio_cache_put(processed_text, segments, streamed=True)
+    
+    def _audio_cache_get(self, processed_text: str, original_text: str,
+                         streamed: bool) -> Optional[List[Dict[str, Any]]]:
+        """Cached segments for this text, as fresh dicts carrying the caller's original text"""
+        key = (self.voice, processed_text, streamed)
+        segments = self._audio_lru.get(key)
+        if segments is None:
+            return None
+        self._audio_lru.move_to_end(key)
+        return [{**segment, "original_text": original_text} for segment in segments]
+    
+    def _audio_cache_put(self, processed_text: str, segments: List[Dict[str, Any]], streamed: bool):
+        """Cache an utterance's segments, evicting least recently used entries over the byte cap"""
+        key = (self.voice, processed_text, streamed)
+        size = sum(len(segment["audio"]) for segment in segments)
+        if not segments or key in self._audio_lru or size > self._audio_cache_bytes:
+            return
+        self._audio_lru[key] = segments
+        self._audio_lru_bytes += size
+        while self._audio_lru_bytes > self._audio_cache_bytes:
+            _, evicted = self._audio_lru.popitem(last=False)
+            self._audio_lru_bytes -= sum(len(segment["audio"]) for segment in evicted)
+    
+    def _next_chunk(self, chunks) -> Optional[Tuple[str, str, Any]]:
+        """Advance a kokoro generator by one chunk (runs in a worker thread)"""
+        import torch
+        # inference_mode is thread-local, so it is entered here rather than by the caller
+        with self._pipeline_lock, torch.inference_mode():
+            return next(chunks, None)
+    
+    async def _build_result(self, original_text: str, processed_text: str, audio_data: np.ndarray,
+                      phoneme_timings: PhonemeTimings) -> Dict[str, Any]:
+        """Build the outbound result (PCM audio plus character and word alignment) for one segment"""
+        # Word-level alignment based on processed text
+        words, word_starts, word_durations = self._generate_word_alignment(processed_text, phoneme_timings)
+        
+        # Character-level alignment (for compatibility)
+        char_starts, char_durations = self._generate_character_alignment(processed_text, phoneme_timings)
+        
+        # Convert audio to raw 16-bit PCM bytes off the event loop
+        async with self._encode_sem:
+            audio_pcm = await asyncio.to_thread(self._audio_to_pcm, audio_data)
+        
+        logger.debug("Generated audio chunk: %s bytes, %s characters, %s words", len(audio_pcm), len(char_starts), len(words))
+        
+        # Format output with both original and processed text
+        return {
+            "audio": audio_pcm,
+            "original_text": original_text,
+            "processed_text": processed_text,
+            "alignment": {
+                "chars": list(processed_text),
+                "char_start_times_ms": char_starts.astype(np.int64).tolist(),
+                "char_durations_ms": char_durations.astype(np.int64).tolist()
+            },
+            "word_alignment": {
+                "words": words,
+                "word_start_times_ms": word_starts.astype(np.int64).tolist(),
+                "word_durations_ms": word_durations.astype(np.int64).tolist()
+            }
+        }
+    
     def _clean_text(self, text: str, original_text: str = None) -> str:
         """Clean and normalize input text, including mathematical notation"""
         original_for_debug = original_text or text
-        
+        text = self._normalize_text(text)
+        logger.debug("Text processing: original='%s' -> processed='%s'", original_for_debug, text)
+        return text
+    
+    @staticmethod
+    def _normalize_text(text: str) -> str:
+        """Math, LaTeX and whitespace normalization, cached for short (repeatable) texts"""
+        if len(text) > _NORMALIZE_CACHE_MAX_CHARS:
+            return TTSEngine._apply_normalization(text)
+        return TTSEngine._normalize_short_text(text)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _normalize_short_text(text: str) -> str:
+        """Cached _apply_normalization for texts within _NORMALIZE_CACHE_MAX_CHARS"""
+        return TTSEngine._apply_normalization(text)
+    
+    @staticmethod
+    def _apply_normalization(text: str) -> str:
+        """Math, LaTeX and whitespace normalization"""
         # Process mathematical notation first
         text = MathNotationProcessor.process_mathematical_text(text)
         text = MathNotationProcessor.process_latex_expressions(text)
         
         # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text.strip())
-        
-        logger.debug(f"Text processing: original='{original_for_debug}' -> processed='{text}'")
-        return text
+        return _WHITESPACE_RE.sub(' ', text.strip())
     
     async def _generate_g2p_mapping(self, text: str) -> Dict[str, List[str]]:
         """
@@ -250,10 +792,10 @@ class TTSEngine:
                 char_index += 1
                 
         except Exception as e:
-            logger.warning(f"G2P extraction failed: {e}, using mock mapping")
+            logger.warning("G2P extraction failed: %s, using mock mapping", e)
             return self._generate_mock_g2p_mapping(text)
         
-        logger.debug(f"G2P mapping generated for {len(text)} characters")
+        logger.debug("G2P mapping generated for %s characters", len(text))
         return g2p_map
     
     def _generate_mock_g2p_mapping(self, text: str) -> Dict[str, List[str]]:
@@ -269,187 +811,184 @@ class TTSEngine:
                 g2p_map[char] = []  # Punctuation - silent
         return g2p_map
     
-    async def _generate_audio_with_phoneme_timings(self, text: str) -> Tuple[np.ndarray, List[Tuple[str, float, float]]]:
+    async def _generate_audio_with_phoneme_timings(self, text: str) -> Tuple[np.ndarray, PhonemeTimings]:
         """
         Generate audio and extract phoneme timings using kokoro (optimized)
         
         Returns:
             Tuple of (audio_data, phoneme_timings)
-            phoneme_timings: List of (phoneme, start_ms, end_ms)
+            phoneme_timings: PhonemeTimings (phonemes with start/end ms arrays)
         """
         try:
             if isinstance(self.pipeline, str):  # Mock mode
                 return await self._generate_mock_audio_with_timings(text)
             
             # Use kokoro pipeline to generate audio - single pass for efficiency
+            import torch
             generator = self.pipeline(text, voice=self.voice, speed=1.0)
             
-            audio_chunks = []
-            phoneme_timings = []
+            # Copy chunks into one preallocated buffer (sized for ~80ms of audio per
+            # character, grown if kokoro runs long) instead of concatenating at the end
+            full_audio = np.empty(max(int(len(text) * self.kokoro_sample_rate * 0.08), 1), dtype=np.float32)
+            num_samples = 0
+            phoneme_strs, starts, ends = [], [], []
             current_time_ms = 0
             
-            # Process each chunk from kokoro generator in one pass
-            for i, (graphemes, phonemes, audio) in enumerate(generator):
-                logger.debug(f"Chunk {i}: '{graphemes}' -> {len(phonemes)} phonemes, {len(audio)} samples")
-                
-                # Accumulate audio
-                audio_chunks.append(audio)
-                
-                # Calculate timing for phonemes in this chunk (using Kokoro's native sample rate)
-                chunk_duration_ms = (len(audio) / self.kokoro_sample_rate) * 1000
-                
-                if phonemes:
-                    phoneme_duration_ms = chunk_duration_ms / len(phonemes)
+            # Process each chunk from kokoro generator in one pass (no autograd bookkeeping)
+            with torch.inference_mode():
+                for i, (graphemes, phonemes, audio) in enumerate(generator):
+                    logger.debug("Chunk %s: '%s' -> %s phonemes, %s samples", i, graphemes, len(phonemes), len(audio))
                     
-                    # Add phoneme timings
-                    for j, phoneme in enumerate(phonemes):
-                        start_ms = current_time_ms + (j * phoneme_duration_ms)
-                        end_ms = start_ms + phoneme_duration_ms
-                        phoneme_timings.append((phoneme, start_ms, end_ms))
-                else:
-                    # Silent chunk (punctuation, etc.)
-                    phoneme_timings.append(("", current_time_ms, current_time_ms + chunk_duration_ms))
-                
-                current_time_ms += chunk_duration_ms
+                    # Accumulate audio
+                    chunk_end = num_samples + len(audio)
+                    if chunk_end > len(full_audio):
+                        grown = np.empty(max(chunk_end, 2 * len(full_audio)), dtype=np.float32)
+                        grown[:num_samples] = full_audio[:num_samples]
+                        full_audio = grown
+                    full_audio[num_samples:chunk_end] = audio
+                    num_samples = chunk_end
+                    
+                    # Calculate timing for phonemes in this chunk
+                    current_time_ms = self._append_phoneme_timings(phoneme_strs, starts, ends, phonemes, len(audio), current_time_ms)
             
-            # Concatenate all audio chunks
-            if audio_chunks:
-                full_audio = np.concatenate(audio_chunks)
-            else:
-                full_audio = np.array([], dtype=np.float32)
+            full_audio = full_audio[:num_samples]
+            phoneme_timings = PhonemeTimings.from_chunks(phoneme_strs, starts, ends)
             
-            logger.debug(f"Generated {len(full_audio)} audio samples and {len(phoneme_timings)} phoneme timings")
+            logger.debug("Generated %s audio samples and %s phoneme timings", len(full_audio), len(phoneme_timings))
             return full_audio, phoneme_timings
             
         except Exception as e:
-            logger.error(f"Kokoro audio generation failed: {e}, falling back to mock")
+            logger.error("Kokoro audio generation failed: %s, falling back to mock", e)
             return await self._generate_mock_audio_with_timings(text)
     
-    async def _generate_mock_audio_with_timings(self, text: str) -> Tuple[np.ndarray, List[Tuple[str, float, float]]]:
+    def _append_phoneme_timings(self, phoneme_strs: List[str], starts: List[np.ndarray], ends: List[np.ndarray],
+                                phonemes: str, num_samples: int, current_time_ms: float) -> float:
+        """Spread a kokoro chunk's duration evenly over its phonemes; returns the chunk end time"""
+        # Using Kokoro's native sample rate
+        chunk_duration_ms = (num_samples / self.kokoro_sample_rate) * 1000
+        
+        if phonemes:
+            phoneme_duration_ms = chunk_duration_ms / len(phonemes)
+            
+            # Add phoneme timings for the whole chunk at once
+            chunk_starts = current_time_ms + np.arange(len(phonemes)) * phoneme_duration_ms
+            phoneme_strs.extend(phonemes)
+            starts.append(chunk_starts)
+            ends.append(chunk_starts + phoneme_duration_ms)
+        else:
+            # Silent chunk (punctuation, etc.)
+            phoneme_strs.append("")
+            starts.append(np.array([current_time_ms], dtype=np.float64))
+            ends.append(np.array([current_time_ms + chunk_duration_ms], dtype=np.float64))
+        
+        return current_time_ms + chunk_duration_ms
+    
+    async def _generate_mock_audio_with_timings(self, text: str) -> Tuple[np.ndarray, PhonemeTimings]:
         """
         Generate mock audio and timings for development/fallback (44.1kHz output)
         """
         # Generate mock audio (sine wave) - reduced duration per character for faster speech
         duration_seconds = len(text) * 0.08  # 80ms per character (faster than before)
         samples = int(self.target_sample_rate * duration_seconds)
-        t = np.linspace(0, duration_seconds, samples)
         frequency = 220  # A3 note
-        audio_data = (np.sin(2 * np.pi * frequency * t) * 0.5).astype(np.float32)
+        
+        # Sine computed directly into the float32 output buffer
+        audio_data = np.empty(samples, dtype=np.float32)
+        np.sin(np.arange(samples) * (2 * np.pi * frequency / self.target_sample_rate), out=audio_data, dtype=np.float32)
+        audio_data *= 0.5
         
         # Apply fade-in/fade-out to reduce clicks between chunks
         fade_samples = min(int(0.02 * self.target_sample_rate), samples // 20)  # 20ms fade at 44.1kHz
         if samples > fade_samples * 2:
+            fade = np.linspace(0, 1, fade_samples, dtype=np.float32)
             # Fade in
-            audio_data[:fade_samples] *= np.linspace(0, 1, fade_samples)
+            audio_data[:fade_samples] *= fade
             # Fade out
-            audio_data[-fade_samples:] *= np.linspace(1, 0, fade_samples)
+            audio_data[-fade_samples:] *= fade[::-1]
         
-        # Generate mock phoneme timings
-        phoneme_timings = []
+        # Generate mock phoneme timings (one per letter, at that letter's slot)
         ms_per_char = (duration_seconds * 1000) / len(text)
+        letter_positions = np.array([i for i, char in enumerate(text) if char.isalpha()], dtype=np.float64)
+        phoneme_timings = PhonemeTimings(
+            [f"/{char.lower()}/" for char in text if char.isalpha()],
+            letter_positions * ms_per_char,
+            (letter_positions + 1) * ms_per_char
+        )
         
-        for i, char in enumerate(text):
-            if char.isalpha():
-                start_ms = i * ms_per_char
-                end_ms = (i + 1) * ms_per_char
-                phoneme_timings.append((f"/{char.lower()}/", start_ms, end_ms))
-        
-        logger.debug(f"Generated mock audio: {len(audio_data)} samples at {self.target_sample_rate}Hz")
+        logger.debug("Generated mock audio: %s samples at %sHz", len(audio_data), self.target_sample_rate)
         return audio_data, phoneme_timings
     
-    def _generate_word_alignment(self, text: str, phoneme_timings: List[Tuple[str, float, float]]) -> List[Dict[str, Any]]:
+    def _generate_word_alignment(self, text: str, phoneme_timings: PhonemeTimings) -> Tuple[List[str], np.ndarray, np.ndarray]:
         """
         Generate word-level alignment from phoneme timings
         
         Returns:
-            List of word alignment data
+            Tuple of (words, start_ms, duration_ms) with one array entry per word
         """
-        import re
-        
         # Split text into words (keep punctuation attached)
-        words = re.findall(r'\S+', text)
-        word_alignments = []
+        words = _WORD_RE.findall(text)
         
         if not phoneme_timings or not words:
-            return word_alignments
+            return [], np.empty(0), np.empty(0)
         
         # Calculate total audio duration
-        total_duration = phoneme_timings[-1][2] if phoneme_timings else 0
-        
-        # Distribute time across words based on character count
-        total_chars = sum(len(word) for word in words)
-        current_time = 0
+        total_duration = phoneme_timings.total_ms
         
-        for word in words:
-            word_char_count = len(word)
-            # Proportional duration based on character count
-            word_duration = (word_char_count / total_chars) * total_duration if total_chars > 0 else 0
-            
-            word_alignments.append({
-                "word": word,
-                "start_ms": current_time,
-                "duration_ms": word_duration
-            })
-            
-            current_time += word_duration
+        # Distribute time across words proportionally to character count
+        char_counts = np.fromiter((len(word) for word in words), dtype=np.float64, count=len(words))
+        durations = char_counts / char_counts.sum() * total_duration
+        starts = np.empty_like(durations)
+        starts[0] = 0.0
+        np.cumsum(durations[:-1], out=starts[1:])
         
-        logger.debug(f"Generated word alignment for {len(words)} words")
-        return word_alignments
+        logger.debug("Generated word alignment for %s words", len(words))
+        return words, starts, durations
     
-    def _generate_character_alignment(self, text: str, phoneme_timings: List[Tuple[str, float, float]]) -> List[Dict[str, float]]:
+    def _generate_character_alignment(self, text: str, phoneme_timings: PhonemeTimings) -> Tuple[np.ndarray, np.ndarray]:
         """
         Generate character-level alignment from phoneme timings (simplified)
         
         Returns:
-            List of alignment data for each character
+            Tuple of (start_ms, duration_ms) arrays with one entry per character
         """
-        char_alignments = []
+        n = len(text)
         
         if not phoneme_timings:
             # Fallback: even distribution
             char_duration = 100  # 100ms per character
-            for i, char in enumerate(text):
-                char_alignments.append({
-                    "start_ms": i * char_duration,
-                    "duration_ms": char_duration
-                })
-            return char_alignments
-        
-        # Calculate total duration
-        total_duration = phoneme_timings[-1][2] if phoneme_timings else 0
-        char_duration = total_duration / len(text) if len(text) > 0 else 0
-        
-        # Simple even distribution
-        for i, char in enumerate(text):
-            char_alignments.append({
-                "start_ms": i * char_duration,
-                "duration_ms": char_duration
-            })
-        
-        logger.debug(f"Generated character alignment for {len(text)} characters")
-        return char_alignments
-    
-    def _audio_to_base64(self, audio_data: np.ndarray) -> str:
-        """Convert audio data to base64 encoded PCM (44.1 kHz, 16-bit, mono)"""
+        else:
+            # Simple even distribution over total duration
+            total_duration = phoneme_timings.total_ms
+            char_duration = total_duration / n if n > 0 else 0
+        
+        starts = np.arange(n) * char_duration
+        durations = np.full(n, char_duration)
+        
+        logger.debug("Generated character alignment for %s characters", n)
+        return starts, durations
+    
+    def _audio_to_pcm(self, audio_data: np.ndarray) -> bytes:
+        """Convert audio data to raw PCM bytes (44.1 kHz, 16-bit, mono)"""
         # Resample from 24kHz (Kokoro native) to 44.1kHz (target format)
         if self.kokoro_sample_rate != self.target_sample_rate:
-            # Use scipy's resample for high-quality resampling
-            resampling_ratio = self.target_sample_rate / self.kokoro_sample_rate
-            target_length = int(len(audio_data) * resampling_ratio)
-            audio_data = signal.resample(audio_data, target_length)
-            logger.debug(f"Resampled audio from {self.kokoro_sample_rate}Hz to {self.target_sample_rate}Hz")
+            from scipy import signal
+            # Polyphase FIR resampling: O(N * taps), no FFT over the whole chunk
+            audio_data = signal.resample_poly(
+                audio_data, self._resample_up, self._resample_down, window=self._resample_filter
+            )
+            logger.debug("Resampled audio from %sHz to %sHz", self.kokoro_sample_rate, self.target_sample_rate)
         
-        # Convert to 16-bit PCM
-        audio_int16 = (audio_data * 32767).astype(np.int16)
+        # Convert to 16-bit PCM: scale into one float32 buffer and saturate in place,
+        # so samples at or beyond full scale clip instead of wrapping around
+        scaled = np.multiply(audio_data, 32767.0, dtype=np.float32)
+        np.clip(scaled, -32768.0, 32767.0, out=scaled)
+        audio_int16 = scaled.astype(np.int16)
         
         # Convert to bytes
         audio_bytes = audio_int16.tobytes()
         
-        # Encode as base64
-        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-        
-        logger.debug(f"Generated {len(audio_bytes)} bytes of 44.1kHz 16-bit mono PCM audio")
-        return audio_base64
+        logger.debug("Generated %s bytes of 44.1kHz 16-bit mono PCM audio", len(audio_bytes))
+        return audio_bytes
     
     async def cleanup(self):
         """Clean up TTS engine resources"""
@@ -458,10 +997,94 @@ class TTSEngine:
         logger.info("TTS Engine cleaned up")
 
 
+# Per-process state for TTSProcessPool workers
+_worker_engine: Optional[TTSEngine] = None
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _init_worker(compile_model: bool = False):
+    """Load a TTSEngine once per worker process"""
+    global _worker_engine, _worker_loop
+    _worker_loop = asyncio.new_event_loop()
+    _worker_engine = TTSEngine(compile_model=compile_model)
+    _worker_loop.run_until_complete(_worker_engine.initialize())
+
+
+def _worker_is_ready() -> bool:
+    """Report whether this worker's engine is ready"""
+    return _worker_engine is not None and _worker_engine.is_ready()
+
+
+def _worker_generate(text: str) -> Optional[Dict[str, Any]]:
+    """Run one generation on this worker's engine"""
+    return _worker_loop.run_until_complete(_worker_engine.generate_audio_with_alignment(text))
+
+
+class TTSProcessPool:
+    """
+    Runs TTSEngine instances in worker processes so inference and alignment
+    assembly don't hold the event loop's GIL. Same interface as TTSEngine.
+    """
+    
+    def __init__(self, workers: int, compile_model: bool = False, concurrency: int = 4):
+        self.workers = workers
+        self.compile_model = compile_model
+        # Bounds generations queued to the workers across all sessions
+        self._generation_sem = asyncio.Semaphore(concurrency)
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.ready = False
+    
+    async def initialize(self):
+        """Start worker processes and wait until each has loaded its engine"""
+        logger.info("Starting %s TTS worker processes...", self.workers)
+        # spawn, not fork: workers must not inherit torch/CUDA state from the parent
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.compile_model,)
+        )
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(loop.run_in_executor(self.executor, _worker_is_ready) for _ in range(self.workers))
+        )
+        if not all(results):
+            raise RuntimeError("TTS worker failed to initialize")
+        self.ready = True
+        logger.info("TTS worker pool ready (%s processes)", self.workers)
+    
+    def is_ready(self) -> bool:
+        """Check if worker pool is ready"""
+        return self.ready
+    
+    async def generate_audio_with_alignment(self, text: str) -> Optional[Dict[str, Any]]:
+        """Generate audio and alignment on a worker process"""
+        if not self.ready:
+            raise RuntimeError("TTS worker pool not initialized")
+        loop = asyncio.get_running_loop()
+        async with self._generation_sem:
+            return await loop.run_in_executor(self.executor, _worker_generate, text)
+    
+    async def generate_audio_stream(self, text: str) -> AsyncIterator[Dict[str, Any]]:
+        """Generate on a worker process, yielding the whole utterance as one segment"""
+        result = await self.generate_audio_with_alignment(text)
+        if result:
+            yield result
+    
+    async def cleanup(self):
+        """Shut down worker processes"""
+        self.ready = False
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        logger.info("TTS worker pool cleaned up")
+
 
 class MathNotationProcessor:
     """Handles mathematical notation conversion to spoken text"""
     
+    __slots__ = ()
+    
     # Mathematical symbols mapping
     SYMBOL_MAP = {
         # Basic operators
@@ -623,8 +1246,39 @@ class MathNotationProcessor:
         '‰': ' permille ',
     }
     
-    @classmethod
-    def process_mathematical_text(cls, text: str) -> str:
+    # Single-char symbols go through one str.translate pass; hyphens are handled
+    # contextually, so '-' is left out. Multi-char keys are replaced separately.
+    _MULTI_CHAR_MAP = {k: v for k, v in SYMBOL_MAP.items() if len(k) > 1}
+    _BRACKET_TABLE = str.maketrans({
+        '(': ' open parenthesis ', ')': ' close parenthesis ',
+        '[': ' open bracket ', ']': ' close bracket ',
+        '{': ' open brace ', '}': ' close brace ',
+    })
+    _SYMBOL_TABLE = str.maketrans({k: v for k, v in SYMBOL_MAP.items() if len(k) == 1 and k != '-'})
+    # Anything any math pass could rewrite; text without a match only needs whitespace cleanup
+    _MATH_DETECT_RE = re.compile(
+        '[' + re.escape(''.join(sorted({k for k in SYMBOL_MAP if len(k) == 1} | set('^_/()[]{}')))) + ']'
+        + ''.join('|' + re.escape(k) for k in _MULTI_CHAR_MAP)
+        + r'|[0-9.][eE]'
+    )
+    
+    @staticmethod
+    def _spoken_operator(match: re.Match) -> str:
+        """Spoken form of a matched math operator"""
+        return _MATH_OPERATOR_SPOKEN[match.lastgroup]
+    
+    @staticmethod
+    def _spoken_minus(match: re.Match) -> str:
+        """Spoken form of a matched mathematical minus, keeping its left operand"""
+        return f"{match.group('number') or match.group('variable') or ''} minus "
+    
+    @staticmethod
+    def _spoken_latex(match: re.Match) -> str:
+        """Spoken form of a matched LaTeX expression"""
+        return match.expand(_LATEX_SPOKEN[match.lastgroup])
+    
+    @staticmethod
+    def process_mathematical_text(text: str) -> str:
         """
         Convert mathematical notation to spoken text
         
@@ -634,46 +1288,34 @@ class MathNotationProcessor:
         Returns:
             Text with mathematical symbols converted to spoken form
         """
-        processed_text = text
+        # Fast path for plain prose
+        if not MathNotationProcessor._MATH_DETECT_RE.search(text):
+            return _WHITESPACE_RE.sub(' ', text.strip())
         
-        # Handle fractions (basic pattern: number/number)
-        processed_text = re.sub(r'(\d+)/(\d+)', r'\1 over \2', processed_text)
-        
-        # Handle superscripts with ^ notation (x^2, x^n, etc.)
-        processed_text = re.sub(r'([a-zA-Z0-9]+)\^([a-zA-Z0-9]+)', r'\1 to the power of \2', processed_text)
+        processed_text = text
         
-        # Handle subscripts with _ notation (x_1, H_2O, etc.)
-        processed_text = re.sub(r'([a-zA-Z0-9]+)_([a-zA-Z0-9]+)', r'\1 subscript \2', processed_text)
+        # Handle fractions (1/2), powers (x^2), subscripts (H_2O) and scientific notation (1.23e+5)
+        processed_text = _MATH_OPERATOR_RE.sub(MathNotationProcessor._spoken_operator, processed_text)
         
         # Handle parentheses for grouping
-        processed_text = processed_text.replace('(', ' open parenthesis ')
-        processed_text = processed_text.replace(')', ' close parenthesis ')
-        processed_text = processed_text.replace('[', ' open bracket ')
-        processed_text = processed_text.replace(']', ' close bracket ')
-        processed_text = processed_text.replace('{', ' open brace ')
-        processed_text = processed_text.replace('}', ' close brace ')
-        
-        # Handle scientific notation (1.23e+5, 4.56E-3)
-        processed_text = re.sub(r'([0-9.]+)[eE]([+-]?[0-9]+)', r'\1 times 10 to the power of \2', processed_text)
+        processed_text = processed_text.translate(MathNotationProcessor._BRACKET_TABLE)
         
         # SMART HYPHEN HANDLING: Only convert hyphens to "minus" in mathematical contexts
         # Convert mathematical minus (standalone or between numbers/variables)
-        processed_text = re.sub(r'\b(\d+)\s*-\s*(\d+)\b', r'\1 minus \2', processed_text)  # "5 - 3"
-        processed_text = re.sub(r'\b([a-zA-Z])\s*-\s*([a-zA-Z0-9])\b', r'\1 minus \2', processed_text)  # "x - y"
-        processed_text = re.sub(r'\s-\s', ' minus ', processed_text)  # " - " with spaces
+        processed_text = _MINUS_RE.sub(MathNotationProcessor._spoken_minus, processed_text)
         
-        # Replace other mathematical symbols (excluding hyphen from SYMBOL_MAP)
-        symbol_map_no_hyphen = {k: v for k, v in cls.SYMBOL_MAP.items() if k != '-'}
-        for symbol, spoken in symbol_map_no_hyphen.items():
+        # Replace other mathematical symbols (multi-char first so '<<' isn't read as two '<')
+        for symbol, spoken in MathNotationProcessor._MULTI_CHAR_MAP.items():
             processed_text = processed_text.replace(symbol, spoken)
+        processed_text = processed_text.translate(MathNotationProcessor._SYMBOL_TABLE)
         
         # Clean up extra spaces
-        processed_text = re.sub(r'\s+', ' ', processed_text.strip())
+        processed_text = _WHITESPACE_RE.sub(' ', processed_text.strip())
         
         return processed_text
     
-    @classmethod
-    def process_latex_expressions(cls, text: str) -> str:
+    @staticmethod
+    def process_latex_expressions(text: str) -> str:
         """
         Handle basic LaTeX expressions
         
@@ -683,36 +1325,19 @@ class MathNotationProcessor:
         Returns:
             Text with LaTeX converted to spoken form
         """
-        processed_text = text
-        
-        # Handle \frac{a}{b} -> "a over b"
-        processed_text = re.sub(r'\\frac\{([^}]+)\}\{([^}]+)\}', r'\1 over \2', processed_text)
-        
-        # Handle \sqrt{x} -> "square root of x"
-        processed_text = re.sub(r'\\sqrt\{([^}]+)\}', r'square root of \1', processed_text)
+        # Fast path for text without LaTeX
+        if not _LATEX_DETECT_RE.search(text):
+            return _WHITESPACE_RE.sub(' ', text.strip())
         
-        # Handle \sqrt[n]{x} -> "nth root of x"
-        processed_text = re.sub(r'\\sqrt\[([^]]+)\]\{([^}]+)\}', r'\1th root of \2', processed_text)
-        
-        # Handle x^{y} -> "x to the power of y"
-        processed_text = re.sub(r'([a-zA-Z0-9]+)\^\{([^}]+)\}', r'\1 to the power of \2', processed_text)
-        
-        # Handle x_{y} -> "x subscript y"
-        processed_text = re.sub(r'([a-zA-Z0-9]+)_\{([^}]+)\}', r'\1 subscript \2', processed_text)
-        
-        # Handle \sum_{i=1}^{n} -> "sum from i equals 1 to n"
-        processed_text = re.sub(r'\\sum_\{([^}]+)\}\^\{([^}]+)\}', r'sum from \1 to \2', processed_text)
-        
-        # Handle \int_{a}^{b} -> "integral from a to b"
-        processed_text = re.sub(r'\\int_\{([^}]+)\}\^\{([^}]+)\}', r'integral from \1 to \2', processed_text)
+        processed_text = text
         
-        # Handle \lim_{x \to a} -> "limit as x approaches a"
-        processed_text = re.sub(r'\\lim_\{([^}]+)\\to\s*([^}]+)\}', r'limit as \1 approaches \2', processed_text)
+        # Handle \frac, \sqrt, \sum, \int, \lim, x^{y} and x_{y} in one pass
+        processed_text = _LATEX_RE.sub(MathNotationProcessor._spoken_latex, processed_text)
         
         # Remove remaining LaTeX commands
-        processed_text = re.sub(r'\\[a-zA-Z]+', '', processed_text)
+        processed_text = _LATEX_COMMAND_RE.sub('', processed_text)
         
         # Clean up
-        processed_text = re.sub(r'\s+', ' ', processed_text.strip())
+        processed_text = _WHITESPACE_RE.sub(' ', processed_text.strip())
         
         return processed_text